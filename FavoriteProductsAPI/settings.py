@@ -89,9 +89,26 @@ DATABASES = {
         'PASSWORD': os.environ.get("DB_PASSWORD"),
         'HOST': 'db',
         'PORT': '5432',
+        'CONN_MAX_AGE': int(os.environ.get("DB_CONN_MAX_AGE", 60)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+######################################################################
+# Caches
+######################################################################
+CACHES = {
+    # Per process: entries dropped by signals stay stale in other workers until their TTL
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Outlives a single process: sync_products runs as a new process every time
+    'sync': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get("SYNC_CACHE_DIR", BASE_DIR / ".cache" / "sync"),
+    },
+}
+
 
 ######################################################################
 # Authentication
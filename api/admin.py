@@ -6,3 +6,4 @@ from api.models import AuthToken
 @admin.register(AuthToken)
 class AuthTokenAdmin(admin.ModelAdmin):
     list_display = ('key', 'user')
+    list_select_related = ('user',)
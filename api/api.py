@@ -3,10 +3,10 @@ from ninja import NinjaAPI
 from api.auth.endpoints import auth_router
 from api.common.endpoints import common_router
 from api.management.endpoints import management_router
-from api.utils import ApiKey, AdminApiKey
+from api.utils import ApiKey, CompactJSONRenderer
 
 header_key = ApiKey()
-admin_header_key = AdminApiKey()
+admin_header_key = ApiKey(admin_only=True)
 
 description = f"""
 An API that lets the management manage clients (CRUD) and stores/shows information about the clients' favorite products.
@@ -19,6 +19,7 @@ api = NinjaAPI(
     version="1.0.0",
     description=description,
     auth=header_key,
+    renderer=CompactJSONRenderer(),
 )
 
 api.add_router("/auth", auth_router, tags=["auth"])
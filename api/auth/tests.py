@@ -1,12 +1,20 @@
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
 
 from api.models import AuthToken
 from api.tests import TestHelper
+from api.utils import auth_user_cache_key
 
 class AuthTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, _ = TestHelper.create_customer_user()
+
     def setUp(self):
         super().setUp()
-        self.user, _ = TestHelper.create_customer_user()
+        cache.clear()
         self.client = TestHelper.client_from_user(self.user)
 
 
@@ -57,6 +65,52 @@ class GetAuthUserTests(AuthTestCase):
 
         self.assertEqual(response.status_code, 401)
 
+    def test_get_auth_user_loads_only_needed_columns(self):
+        """Test that the auth lookup skips unused user columns like the password hash"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"password"', queries[0]['sql'])
+
+    def test_get_auth_user_lookup_is_cached(self):
+        """Test that repeated requests with the same token skip the database"""
+        self.client.get(self.url)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_auth_user_caches_only_primitive_fields(self):
+        """Test that the auth cache holds the user's column values, not a model instance"""
+        self.client.get(self.url)
+
+        self.assertEqual(
+            cache.get(auth_user_cache_key(self.user.pk)),
+            (self.user.pk, self.user.name, self.user.email, self.user.role),
+        )
+
+    def test_get_auth_user_with_token_deleted_after_login(self):
+        """Test that a cached token stops working once it is deleted"""
+        self.client.get(self.url)
+        AuthToken.objects.filter(user=self.user).delete()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 401)
+
+    def test_get_auth_user_reflects_user_update(self):
+        """Test that a cached user is refreshed after the user is saved"""
+        self.client.get(self.url)
+        self.user.name = "Updated Name"
+        self.user.save()
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.json()['name'], "Updated Name")
+
 
 class GetAuthTokenTests(AuthTestCase):
     def setUp(self):
@@ -75,6 +129,14 @@ class GetAuthTokenTests(AuthTestCase):
 
         self.assertEqual(token, self.user.token)
 
+    def test_get_auth_token_single_query(self):
+        """Test that the token is served from the authentication lookup"""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), self.user.token)
+
     def test_get_auth_token_without_authentication(self):
         """Test that endpoint returns 401 when no authentication is provided"""
         unauthenticated_client = Client()
@@ -124,7 +186,6 @@ class GetAuthTokenTests(AuthTestCase):
         self.assertEqual(token1, token2)
 
 
-import json
 from django.test import TestCase, Client
 
 class LoginTests(AuthTestCase):
@@ -137,7 +198,7 @@ class LoginTests(AuthTestCase):
         """Test successful login with valid credentials"""
         response = self.client.post(
             self.url,
-            data=json.dumps({"email": self.user.email, "password": self.password}),
+            data={"email": self.user.email, "password": self.password},
             content_type='application/json'
         )
 
@@ -154,7 +215,7 @@ class LoginTests(AuthTestCase):
 
         response = self.client.post(
             self.url,
-            data=json.dumps({"email": self.user.email, "password": self.password}),
+            data={"email": self.user.email, "password": self.password},
             content_type='application/json'
         )
 
@@ -167,7 +228,7 @@ class LoginTests(AuthTestCase):
         """Test login fails with incorrect password"""
         response = self.client.post(
             self.url,
-            data=json.dumps({"email": self.user.email, "password": "wrongpassword"}),
+            data={"email": self.user.email, "password": "wrongpassword"},
             content_type='application/json'
         )
 
@@ -181,7 +242,7 @@ class LoginTests(AuthTestCase):
         """Test login fails with non-existent email"""
         response = self.client.post(
             self.url,
-            data=json.dumps({"email": "nonexistent@example.com", "password": self.password}),
+            data={"email": "nonexistent@example.com", "password": self.password},
             content_type='application/json'
         )
 
@@ -195,7 +256,7 @@ class LoginTests(AuthTestCase):
         """Test login fails with empty email"""
         response = self.client.post(
             self.url,
-            data=json.dumps({"email": "", "password": self.password}),
+            data={"email": "", "password": self.password},
             content_type='application/json'
         )
 
@@ -205,7 +266,7 @@ class LoginTests(AuthTestCase):
         """Test login fails with empty password"""
         response = self.client.post(
             self.url,
-            data=json.dumps({"email": self.user.email, "password": ""}),
+            data={"email": self.user.email, "password": ""},
             content_type='application/json'
         )
 
@@ -217,7 +278,7 @@ class LoginTests(AuthTestCase):
 
         response = self.client.post(
             self.url,
-            data=json.dumps({"email": self.user.email, "password": self.password}),
+            data={"email": self.user.email, "password": self.password},
             content_type='application/json'
         )
 
@@ -232,7 +293,7 @@ class LoginTests(AuthTestCase):
         """Test that email matching is case-sensitive"""
         response = self.client.post(
             self.url,
-            data=json.dumps({"email": self.user.email.upper(), "password": self.password}),
+            data={"email": self.user.email.upper(), "password": self.password},
             content_type='application/json'
         )
 
@@ -242,12 +303,12 @@ class LoginTests(AuthTestCase):
         """Test that logging in multiple times returns the same token"""
         response1 = self.client.post(
             self.url,
-            data=json.dumps({"email": self.user.email, "password": self.password}),
+            data={"email": self.user.email, "password": self.password},
             content_type='application/json'
         )
         response2 = self.client.post(
             self.url,
-            data=json.dumps({"email": self.user.email, "password": self.password}),
+            data={"email": self.user.email, "password": self.password},
             content_type='application/json'
         )
 
@@ -264,7 +325,7 @@ class LoginTests(AuthTestCase):
         unauthenticated_client = Client()
         response = unauthenticated_client.post(
             self.url,
-            data=json.dumps({"email": self.user.email, "password": self.password}),
+            data={"email": self.user.email, "password": self.password},
             content_type='application/json'
         )
 
@@ -1,24 +1,55 @@
 import requests
+from django.core.cache import cache
 from django.db import IntegrityError
 from ninja import Router
-from ninja.pagination import PageNumberPagination, paginate
+from ninja.pagination import paginate
 
-from api.common.schemas import ProductSchemaOut
-from api.product_api import ProductAPIClient
-from api.utils import create_product_from_api_data
+from api.common.schemas import FavoritesBatchSchemaIn, ProductSchemaOut
+from api.product_api import product_api_client
+from api.utils import (
+    CachedCountPagination, favorites_count_key, fetch_product_from_api, fetch_products_from_api, stream_queryset,
+)
 from core.models import Product, FavoriteProducts
 
 common_router = Router()
 
+def favorites_queryset(user):
+    return Product.objects.filter(favoriteproducts__user=user).order_by("date_created")
+
+@common_router.get("/favorites/stream")
+def stream_favorites(request):
+    return stream_queryset(favorites_queryset(request.auth), ProductSchemaOut.Meta.fields)
+
+@common_router.post("/favorites/batch", response={201: list[ProductSchemaOut], 400: dict})
+def add_favorites_batch(request, payload: FavoritesBatchSchemaIn):
+    p_ids = list(dict.fromkeys(payload.p_ids))
+    products = list(Product.objects.only(*ProductSchemaOut.Meta.fields).filter(api_id__in=p_ids))
+
+    local_ids = {product.api_id for product in products}
+    missing_ids = [p_id for p_id in p_ids if p_id not in local_ids]
+    if missing_ids:
+        products += fetch_products_from_api(product_api_client, missing_ids)
+
+    if not products:
+        return 400, {"error": "None of the products were found or could be fetched from the API."}
+
+    FavoriteProducts.objects.bulk_create(
+        [FavoriteProducts(user=request.auth, product=product) for product in products],
+        ignore_conflicts=True,
+    )
+
+    cache.delete(favorites_count_key(request.auth.id))
+    positions = {p_id: position for position, p_id in enumerate(p_ids)}
+    products.sort(key=lambda product: positions[product.api_id])
+    return 201, products
+
 @common_router.post("/favorites/{p_id}", response={201: ProductSchemaOut, 400: dict})
 def add_favorite(request, p_id: int):
-    product = Product.objects.filter(api_id=p_id).first()
-    client = ProductAPIClient()
+    product = Product.objects.only(*ProductSchemaOut.Meta.fields).filter(api_id=p_id).first()
 
     if not product:
         try:
-            product_data = client.get_product(p_id)
-            product = create_product_from_api_data(product_data)
+            product = fetch_product_from_api(product_api_client, p_id)
         except (requests.RequestException, KeyError, ValueError) as _:
             return 400, {"error": "Product not found or could not be fetched from the API."}
     try:
@@ -26,19 +57,20 @@ def add_favorite(request, p_id: int):
     except IntegrityError:
         return 400, {"error": "The product selected is already on user's favorites."}
 
+    cache.delete(favorites_count_key(request.auth.id))
     return 201, product
 
 @common_router.post("/favorites/{p_id}/delete", response={204: None, 400: str})
 def delete_favorite(request, p_id: int):
-    product_in_favorite = FavoriteProducts.objects.filter(user=request.auth, product__api_id=p_id).first()
+    deleted, _ = FavoriteProducts.objects.filter(user=request.auth, product__api_id=p_id).delete()
 
-    if not product_in_favorite:
+    if not deleted:
         return 400, "This product is not on your favorites."
 
-    product_in_favorite.delete()
+    cache.delete(favorites_count_key(request.auth.id))
     return 204, None
 
 @common_router.get("/favorites", response={200: list[ProductSchemaOut]})
-@paginate(PageNumberPagination, page_size=20)
+@paginate(CachedCountPagination, page_size=20, count_key=lambda request: favorites_count_key(request.auth.id))
 def get_favorites(request):
-    return Product.objects.filter(favoriteproducts__user=request.auth).order_by("date_created")
+    return favorites_queryset(request.auth).values(*ProductSchemaOut.Meta.fields)
@@ -1,4 +1,4 @@
-from ninja import ModelSchema
+from ninja import Field, ModelSchema, Schema
 
 from core.models import Product
 
@@ -7,3 +7,8 @@ class ProductSchemaOut(ModelSchema):
     class Meta:
         model = Product
         fields = ['api_id', 'title', 'image', 'price', 'rating_rate', 'rating_count']
+
+
+class FavoritesBatchSchemaIn(Schema):
+    # Missing products are fetched upstream on a shared pool, so a batch is kept small
+    p_ids: list[int] = Field(..., min_length=1, max_length=50)
@@ -1,18 +1,25 @@
+import json
+
 import requests
+from django.core.cache import cache
 from django.test import TestCase, Client
 from decimal import Decimal
 
-from api.product_api import ProductAPIClient
+from api.product_api import ProductNotFoundError, product_api_client, product_sync_client
 from api.tests import TestHelper
-from api.utils import create_product_from_api_data
+from api.utils import bulk_create_products_from_api_data, create_product_from_api_data
 from core.models import Product, FavoriteProducts
-from unittest.mock import patch, Mock
+from unittest.mock import patch
 
 
 class CommonTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, _ = TestHelper.create_customer_user()
+
     def setUp(self):
         super().setUp()
-        self.user, _ = TestHelper.create_customer_user()
+        cache.clear()
         self.client = TestHelper.client_from_user(self.user)
 
 
@@ -46,7 +53,7 @@ class AddFavoriteTests(CommonTestCase):
     def test_add_favorite_existing_product(self):
         """Test adding an existing local product to favorites"""
         p_id = 2
-        product_data = ProductAPIClient().get_product(p_id)
+        product_data = product_api_client.get_product(p_id)
         product = create_product_from_api_data(product_data)
 
         response = self.client.post(self.url_template.format(p_id))
@@ -59,6 +66,18 @@ class AddFavoriteTests(CommonTestCase):
         ).exists()
         self.assertTrue(favorite_exists)
 
+    @patch('api.common.endpoints.product_api_client')
+    def test_add_favorite_local_product_skips_api(self, mock_client):
+        """Test that a product already stored locally is not fetched from the API"""
+        p_id = 13
+        TestHelper.create_product(p_id)
+
+        response = self.client.post(self.url_template.format(p_id))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['title'], "Test Product")
+        mock_client.get_product.assert_not_called()
+
     def test_add_favorite_duplicate(self):
         """Test that adding the same product twice returns error"""
         p_id = 3
@@ -103,14 +122,12 @@ class AddFavoriteTests(CommonTestCase):
 
         self.assertEqual(response.status_code, 401)
 
-    @patch('api.common.endpoints.ProductAPIClient')
+    @patch('api.common.endpoints.product_api_client')
     def test_add_favorite_api_request_exception(self, mock_client):
         """Test handling of API request failures"""
         p_id = 5
 
-        mock_instance = Mock()
-        mock_instance.get_product.side_effect = requests.RequestException("API Down")
-        mock_client.return_value = mock_instance
+        mock_client.get_product.side_effect = requests.RequestException("API Down")
 
         response = self.client.post(self.url_template.format(p_id))
 
@@ -123,14 +140,12 @@ class AddFavoriteTests(CommonTestCase):
             "Product not found or could not be fetched from the API."
         )
 
-    @patch('api.common.endpoints.ProductAPIClient')
+    @patch('api.common.endpoints.product_api_client')
     def test_add_favorite_api_key_error(self, mock_client):
         """Test handling of malformed API response (KeyError)"""
         p_id = 6
 
-        mock_instance = Mock()
-        mock_instance.get_product.return_value = {"incomplete": "data"}
-        mock_client.return_value = mock_instance
+        mock_client.get_product.return_value = {"incomplete": "data"}
 
         response = self.client.post(self.url_template.format(p_id))
 
@@ -139,6 +154,36 @@ class AddFavoriteTests(CommonTestCase):
 
         self.assertIn('error', response_data)
 
+    @patch('api.common.endpoints.product_api_client')
+    def test_add_favorite_invalid_product_is_not_refetched(self, mock_client):
+        """Test that an id the API reported as not found is not requested again right away"""
+        p_id = 14
+
+        mock_client.get_product.side_effect = ProductNotFoundError("Not found")
+
+        response1 = self.client.post(self.url_template.format(p_id))
+        response2 = self.client.post(self.url_template.format(p_id))
+
+        self.assertEqual(response1.status_code, 400)
+        self.assertEqual(response2.status_code, 400)
+        mock_client.get_product.assert_called_once_with(p_id)
+
+    @patch('api.common.endpoints.product_api_client')
+    def test_add_favorite_upstream_errors_are_refetched(self, mock_client):
+        """Test that server errors and malformed payloads are not remembered as missing products"""
+        p_id = 15
+
+        mock_client.get_product.side_effect = [
+            requests.HTTPError("503 Service Unavailable"),
+            {"incomplete": "data"},
+            TestHelper.api_product_data(p_id),
+        ]
+
+        responses = [self.client.post(self.url_template.format(p_id)) for _ in range(3)]
+
+        self.assertEqual([response.status_code for response in responses], [400, 400, 201])
+        self.assertEqual(mock_client.get_product.call_count, 3)
+
     def test_add_favorite_multiple_products(self):
         """Test adding multiple different products to favorites"""
         product_ids = [7, 8, 9]
@@ -194,6 +239,206 @@ class AddFavoriteTests(CommonTestCase):
         product_count = Product.objects.filter(api_id=p_id).count()
         self.assertEqual(product_count, 1)
 
+    def test_create_product_from_api_data_upserts(self):
+        """Test that storing an already stored product updates it in place"""
+        product = TestHelper.create_product(15)
+        data = TestHelper.api_product_data(15, title="Updated Product", price=79.9, description="Updated description")
+
+        with self.assertNumQueries(1):
+            updated = create_product_from_api_data(data)
+
+        self.assertEqual(updated.pk, product.pk)
+        self.assertEqual(Product.objects.filter(api_id=15).count(), 1)
+        product.refresh_from_db()
+        self.assertEqual(product.title, "Updated Product")
+        self.assertEqual(product.price, Decimal("79.90"))
+
+    def test_bulk_create_products_from_api_data_single_query(self):
+        """Test that a list of API products is stored with one statement"""
+        items = [
+            TestHelper.api_product_data(30 + i, rating={"rate": 3.5, "count": i + 1} if i else None)
+            for i in range(5)
+        ]
+
+        with self.assertNumQueries(1):
+            products = bulk_create_products_from_api_data(items)
+
+        self.assertEqual([product.api_id for product in products], [30, 31, 32, 33, 34])
+        self.assertEqual(Product.objects.filter(api_id__range=(30, 34)).count(), 5)
+        self.assertIsNone(Product.objects.get(api_id=30).rating_rate)
+
+    def test_create_product_from_api_data_keeps_zero_rating(self):
+        """Test that a zero rating is stored as zero rather than missing"""
+        product = create_product_from_api_data(TestHelper.api_product_data(40, rating={"rate": 0, "count": 0}))
+
+        product.refresh_from_db()
+        self.assertEqual(product.rating_rate, Decimal("0"))
+        self.assertEqual(product.rating_count, 0)
+
+
+class AddFavoritesBatchTests(CommonTestCase):
+    def setUp(self):
+        super().setUp()
+        self.url = "/api/common/favorites/batch"
+
+    def post_batch(self, p_ids):
+        return self.client.post(
+            self.url,
+            data={"p_ids": p_ids},
+            content_type='application/json'
+        )
+
+    @patch('api.common.endpoints.product_api_client')
+    def test_add_favorites_batch_success(self, mock_client):
+        """Test adding local and remote products in one request"""
+        TestHelper.create_product(20)
+        mock_client.get_products.side_effect = lambda p_ids: [TestHelper.api_product_data(p_id) for p_id in p_ids]
+
+        response = self.post_batch([21, 20, 22])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item['api_id'] for item in response.json()], [21, 20, 22])
+        self.assertEqual(FavoriteProducts.objects.filter(user=self.user).count(), 3)
+        mock_client.get_products.assert_called_once_with([21, 22])
+
+    @patch('api.common.endpoints.product_api_client')
+    def test_add_favorites_batch_skips_invalid_products(self, mock_client):
+        """Test that ids the API cannot resolve are left out of the batch"""
+        results = {23: TestHelper.api_product_data(23), 24: ProductNotFoundError("Not found")}
+        mock_client.get_products.side_effect = lambda p_ids: [results[p_id] for p_id in p_ids]
+
+        response = self.post_batch([23, 24])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item['api_id'] for item in response.json()], [23])
+        self.assertFalse(Product.objects.filter(api_id=24).exists())
+
+        self.post_batch([24])
+        mock_client.get_products.assert_called_with([])
+
+    def test_add_favorites_batch_ignores_existing_favorites(self):
+        """Test that products already on favorites are not duplicated"""
+        product = TestHelper.create_product(25)
+        FavoriteProducts.objects.create(user=self.user, product=product)
+
+        response = self.post_batch([25, 25])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(FavoriteProducts.objects.filter(user=self.user, product=product).count(), 1)
+
+    @patch('api.common.endpoints.product_api_client')
+    def test_add_favorites_batch_all_invalid(self, mock_client):
+        """Test that a batch with no resolvable products is rejected"""
+        mock_client.get_products.return_value = [requests.RequestException("API Error")] * 2
+
+        response = self.post_batch([26, 27])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json())
+        self.assertFalse(FavoriteProducts.objects.filter(user=self.user).exists())
+
+    @patch('api.common.endpoints.product_api_client')
+    def test_add_favorites_batch_rejects_empty_and_oversized_lists(self, mock_client):
+        """Test that a batch must hold between 1 and 50 ids"""
+        for p_ids in ([], list(range(1, 52))):
+            response = self.post_batch(p_ids)
+
+            self.assertEqual(response.status_code, 422, len(p_ids))
+
+        mock_client.get_products.assert_not_called()
+        self.assertFalse(FavoriteProducts.objects.filter(user=self.user).exists())
+
+    def test_add_favorites_batch_refreshes_count(self):
+        """Test that the cached favorites count is invalidated after a batch"""
+        TestHelper.create_product(28)
+        TestHelper.create_product(29)
+        self.client.get("/api/common/favorites")
+
+        self.post_batch([28, 29])
+        response = self.client.get("/api/common/favorites")
+
+        self.assertEqual(response.json()['count'], 2)
+
+
+class ProductAPIClientTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    @patch.object(product_api_client.session, 'get')
+    def test_get_product_is_cached(self, mock_get):
+        """Test that a product payload is only requested once within the TTL"""
+        mock_get.return_value.content = b'{"id": 1, "title": "Product 1"}'
+
+        first = product_api_client.get_product(1)
+        second = product_api_client.get_product(1)
+
+        self.assertEqual(first, second)
+        mock_get.assert_called_once()
+
+    @patch.object(product_api_client.session, 'get')
+    def test_get_product_does_not_cache_failures(self, mock_get):
+        """Test that an unparseable response is requested again"""
+        mock_get.return_value.content = b''
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                product_api_client.get_product(1)
+
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch.object(product_api_client.session, 'get')
+    def test_get_product_not_found(self, mock_get):
+        """Test that a 404 is reported as a missing product"""
+        mock_get.return_value.status_code = 404
+
+        with self.assertRaises(ProductNotFoundError):
+            product_api_client.get_product(1)
+
+    @patch.object(product_api_client.session, 'get')
+    def test_get_product_server_error(self, mock_get):
+        """Test that a server error is raised as an HTTP error, not as a missing product"""
+        mock_get.return_value.status_code = 503
+        mock_get.return_value.raise_for_status.side_effect = requests.HTTPError("503 Service Unavailable")
+
+        with self.assertRaises(requests.HTTPError):
+            product_api_client.get_product(1)
+
+    @patch.object(product_api_client, 'get_product')
+    def test_get_products_keeps_order_and_errors(self, mock_get_product):
+        """Test that get_products returns one result per id, failures included"""
+        error = requests.RequestException("API Error")
+
+        def get_product(p_id):
+            if p_id == 2:
+                raise error
+            return {"id": p_id}
+
+        mock_get_product.side_effect = get_product
+
+        results = product_api_client.get_products([3, 2, 1])
+
+        self.assertEqual(results, [{"id": 3}, error, {"id": 1}])
+
+    def test_only_sync_client_retries(self):
+        """Test that the client used while serving requests never retries"""
+        def adapter_retries(client):
+            return client.session.get_adapter(f"{client.API_URL}/products").max_retries.total
+
+        self.assertEqual(adapter_retries(product_api_client), 0)
+        self.assertEqual(adapter_retries(product_sync_client), 3)
+
+    @patch.object(product_api_client.session, 'get')
+    def test_get_product_list_not_modified(self, mock_get):
+        """Test that the catalog is requested conditionally and a 304 returns no products"""
+        mock_get.return_value.status_code = 304
+
+        products, etag = product_api_client.get_product_list(etag='"v1"')
+
+        self.assertIsNone(products)
+        self.assertEqual(etag, '"v1"')
+        self.assertEqual(mock_get.call_args.kwargs["headers"], {"If-None-Match": '"v1"'})
+
 
 class DeleteFavoriteTests(CommonTestCase):
     def setUp(self):
@@ -204,14 +449,7 @@ class DeleteFavoriteTests(CommonTestCase):
         """Test successfully deleting an existing favorite"""
         p_id = 1
 
-        product = Product.objects.create(
-            api_id=p_id,
-            title="Test Product",
-            price=Decimal("99.99"),
-            description="Test description",
-            category="test",
-            image="https://example.com/image.png"
-        )
+        product = TestHelper.create_product(p_id)
         FavoriteProducts.objects.create(user=self.user, product=product)
 
         response = self.client.post(self.url_template.format(p_id))
@@ -224,6 +462,19 @@ class DeleteFavoriteTests(CommonTestCase):
         ).exists()
         self.assertFalse(favorite_exists)
 
+    def test_delete_favorite_query_count(self):
+        """Test that a favorite is removed with a single DELETE"""
+        p_id = 10
+
+        product = TestHelper.create_product(p_id)
+        FavoriteProducts.objects.create(user=self.user, product=product)
+
+        # auth lookup + DELETE
+        with self.assertNumQueries(2):
+            response = self.client.post(self.url_template.format(p_id))
+
+        self.assertEqual(response.status_code, 204)
+
     def test_delete_favorite_not_in_favorites(self):
         """Test deleting a product that is not in user's favorites"""
         p_id = 2
@@ -255,14 +506,7 @@ class DeleteFavoriteTests(CommonTestCase):
         """Test that deleting a favorite doesn't delete the product itself"""
         p_id = 4
 
-        product = Product.objects.create(
-            api_id=p_id,
-            title="Test Product",
-            price=Decimal("99.99"),
-            description="Test description",
-            category="test",
-            image="https://example.com/image.png"
-        )
+        product = TestHelper.create_product(p_id)
         FavoriteProducts.objects.create(user=self.user, product=product)
 
         response = self.client.post(self.url_template.format(p_id))
@@ -276,14 +520,7 @@ class DeleteFavoriteTests(CommonTestCase):
         """Test that deleting only removes the current user's favorite, not others'"""
         p_id = 5
 
-        product = Product.objects.create(
-            api_id=p_id,
-            title="Test Product",
-            price=Decimal("99.99"),
-            description="Test description",
-            category="test",
-            image="https://example.com/image.png"
-        )
+        product = TestHelper.create_product(p_id)
 
         FavoriteProducts.objects.create(user=self.user, product=product)
 
@@ -310,14 +547,7 @@ class DeleteFavoriteTests(CommonTestCase):
         """Test that deleting the same favorite twice returns error on second attempt"""
         p_id = 6
 
-        product = Product.objects.create(
-            api_id=p_id,
-            title="Test Product",
-            price=Decimal("99.99"),
-            description="Test description",
-            category="test",
-            image="https://example.com/image.png"
-        )
+        product = TestHelper.create_product(p_id)
         FavoriteProducts.objects.create(user=self.user, product=product)
 
         response1 = self.client.post(self.url_template.format(p_id))
@@ -332,24 +562,10 @@ class DeleteFavoriteTests(CommonTestCase):
         p_id1 = 7
         p_id2 = 8
 
-        product1 = Product.objects.create(
-            api_id=p_id1,
-            title="Test Product 1",
-            price=Decimal("99.99"),
-            description="Test description",
-            category="test",
-            image="https://example.com/image.png"
-        )
+        product1 = TestHelper.create_product(p_id1, title="Test Product 1")
         FavoriteProducts.objects.create(user=self.user, product=product1)
 
-        product2 = Product.objects.create(
-            api_id=p_id2,
-            title="Test Product 2",
-            price=Decimal("89.99"),
-            description="Test description",
-            category="test",
-            image="https://example.com/image.png"
-        )
+        product2 = TestHelper.create_product(p_id2, title="Test Product 2", price=Decimal("89.99"))
         FavoriteProducts.objects.create(user=self.user, product=product2)
 
         response = self.client.post(self.url_template.format(p_id1))
@@ -371,14 +587,7 @@ class DeleteFavoriteTests(CommonTestCase):
         """Test that successful deletion returns 204 with no response body"""
         p_id = 9
 
-        product = Product.objects.create(
-            api_id=p_id,
-            title="Test Product",
-            price=Decimal("99.99"),
-            description="Test description",
-            category="test",
-            image="https://example.com/image.png"
-        )
+        product = TestHelper.create_product(p_id)
         FavoriteProducts.objects.create(user=self.user, product=product)
 
         response = self.client.post(self.url_template.format(p_id))
@@ -404,16 +613,15 @@ class GetFavoritesTests(CommonTestCase):
         self.assertEqual(response_data['items'], [])
         self.assertEqual(response_data['count'], 0)
 
+    def test_get_favorites_compact_json(self):
+        """Test that responses are rendered without extra whitespace"""
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.content, b'{"items":[],"count":0}')
+
     def test_get_favorites_single_product(self):
         """Test getting favorites with one product"""
-        product = Product.objects.create(
-            api_id=1,
-            title="Test Product",
-            price=Decimal("99.99"),
-            description="Test description",
-            category="test",
-            image="https://example.com/image.png"
-        )
+        product = TestHelper.create_product(1)
         FavoriteProducts.objects.create(user=self.user, product=product)
 
         response = self.client.get(self.url)
@@ -428,16 +636,7 @@ class GetFavoritesTests(CommonTestCase):
 
     def test_get_favorites_multiple_products(self):
         """Test getting favorites with multiple products"""
-        for i in range(5):
-            product = Product.objects.create(
-                api_id=i + 1,
-                title=f"Test Product {i + 1}",
-                price=Decimal(f"{10 + i}.99"),
-                description="Test description",
-                category="test",
-                image="https://example.com/image.png"
-            )
-            FavoriteProducts.objects.create(user=self.user, product=product)
+        TestHelper.create_favorites(self.user, 5)
 
         response = self.client.get(self.url)
 
@@ -451,14 +650,7 @@ class GetFavoritesTests(CommonTestCase):
         """Test that favorites are ordered by date_created"""
         products = []
         for i in range(3):
-            product = Product.objects.create(
-                api_id=i + 1,
-                title=f"Product {i + 1}",
-                price=Decimal("99.99"),
-                description="Test description",
-                category="test",
-                image="https://example.com/image.png"
-            )
+            product = TestHelper.create_product(i + 1, title=f"Product {i + 1}")
             FavoriteProducts.objects.create(user=self.user, product=product)
             products.append(product)
 
@@ -474,16 +666,7 @@ class GetFavoritesTests(CommonTestCase):
     def test_get_favorites_pagination_first_page(self):
         """Test pagination on first page"""
 
-        for i in range(25):
-            product = Product.objects.create(
-                api_id=i + 1,
-                title=f"Product {i + 1}",
-                price=Decimal("99.99"),
-                description="Test description",
-                category="test",
-                image="https://example.com/image.png"
-            )
-            FavoriteProducts.objects.create(user=self.user, product=product)
+        TestHelper.create_favorites(self.user, 25)
 
         response = self.client.get(self.url)
 
@@ -496,16 +679,7 @@ class GetFavoritesTests(CommonTestCase):
     def test_get_favorites_pagination_second_page(self):
         """Test pagination on second page"""
 
-        for i in range(25):
-            product = Product.objects.create(
-                api_id=i + 1,
-                title=f"Product {i + 1}",
-                price=Decimal("99.99"),
-                description="Test description",
-                category="test",
-                image="https://example.com/image.png"
-            )
-            FavoriteProducts.objects.create(user=self.user, product=product)
+        TestHelper.create_favorites(self.user, 25)
 
         response = self.client.get(f"{self.url}?page=2")
 
@@ -517,16 +691,7 @@ class GetFavoritesTests(CommonTestCase):
 
     def test_get_favorites_pagination_page_out_of_range(self):
         """Test requesting a page number that doesn't exist"""
-        for i in range(5):
-            product = Product.objects.create(
-                api_id=i + 1,
-                title=f"Product {i + 1}",
-                price=Decimal("99.99"),
-                description="Test description",
-                category="test",
-                image="https://example.com/image.png"
-            )
-            FavoriteProducts.objects.create(user=self.user, product=product)
+        TestHelper.create_favorites(self.user, 5)
 
         response = self.client.get(f"{self.url}?page=10")
 
@@ -535,6 +700,41 @@ class GetFavoritesTests(CommonTestCase):
 
         self.assertEqual(response_data['items'], [])
 
+    def test_get_favorites_query_count(self):
+        """Test that a page of favorites is loaded with a single SELECT"""
+        TestHelper.create_favorites(self.user, 5)
+
+        # auth lookup + page items, the count follows from the short page
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['items']), 5)
+        self.assertEqual(response.json()['count'], 5)
+
+    def test_get_favorites_count_is_cached(self):
+        """Test that repeated page requests reuse the cached favorites count"""
+        TestHelper.create_favorites(self.user, 25)
+
+        self.client.get(self.url)
+
+        # page items only, the auth lookup and count come from the cache
+        with self.assertNumQueries(1):
+            response = self.client.get(f"{self.url}?page=2")
+
+        self.assertEqual(response.json()['count'], 25)
+
+    def test_get_favorites_count_refreshed_after_delete(self):
+        """Test that removing a favorite invalidates the cached count"""
+        product = TestHelper.create_product(1)
+        FavoriteProducts.objects.create(user=self.user, product=product)
+
+        self.assertEqual(self.client.get(self.url).json()['count'], 1)
+
+        self.client.post(f"/api/common/favorites/{product.api_id}/delete")
+
+        self.assertEqual(self.client.get(self.url).json()['count'], 0)
+
     def test_get_favorites_without_authentication(self):
         """Test that endpoint requires authentication"""
         unauthenticated_client = Client()
@@ -544,22 +744,8 @@ class GetFavoritesTests(CommonTestCase):
 
     def test_get_favorites_only_user_favorites(self):
         """Test that endpoint only returns current user's favorites"""
-        product1 = Product.objects.create(
-            api_id=1,
-            title="Product 1",
-            price=Decimal("99.99"),
-            description="Test description",
-            category="test",
-            image="https://example.com/image.png"
-        )
-        product2 = Product.objects.create(
-            api_id=2,
-            title="Product 2",
-            price=Decimal("89.99"),
-            description="Test description",
-            category="test",
-            image="https://example.com/image.png"
-        )
+        product1 = TestHelper.create_product(1, title="Product 1")
+        product2 = TestHelper.create_product(2, title="Product 2", price=Decimal("89.99"))
 
         FavoriteProducts.objects.create(user=self.user, product=product1)
 
@@ -598,3 +784,29 @@ class GetFavoritesTests(CommonTestCase):
         self.assertIn('price', item)
         self.assertIn('image', item)
 
+    def test_stream_favorites_matches_paginated_list(self):
+        """Test that the streamed favorites match the paginated endpoint"""
+        FavoriteProducts.objects.bulk_create([
+            FavoriteProducts(user=self.user, product=TestHelper.create_product(i, title=f"Product {i}"))
+            for i in range(1, 4)
+        ])
+
+        with self.assertNumQueries(2):
+            response = self.client.get(f"{self.url}/stream")
+            body = b"".join(response.streaming_content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], "application/json")
+        self.assertEqual(json.loads(body), self.client.get(self.url).json())
+
+    def test_stream_favorites_empty_list(self):
+        """Test streaming favorites when user has none"""
+        response = self.client.get(f"{self.url}/stream")
+
+        self.assertEqual(json.loads(b"".join(response.streaming_content)), {"items": [], "count": 0})
+
+    def test_stream_favorites_without_authentication(self):
+        """Test that streaming favorites requires authentication"""
+        response = Client().get(f"{self.url}/stream")
+
+        self.assertEqual(response.status_code, 401)
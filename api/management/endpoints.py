@@ -1,27 +1,37 @@
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import OuterRef, Subquery
 from ninja import Router, Form
-from ninja.pagination import PageNumberPagination, paginate
+from ninja.pagination import paginate
 
 from api.management.errors import user_errors, user_create_errors, user_update_errors
 from api.management.schemas import UserSchemaIn, UserSchemaOut, UserBaseSchema, UserSchemaUpdate
 from api.models import AuthToken
+from api.utils import SeekPagination, USER_COUNT_KEY, stream_queryset
 from core.models import User
 
 management_router = Router()
 
+user_token_key = AuthToken.objects.filter(user=OuterRef("pk")).order_by("pk").values("key")[:1]
+
 @management_router.get("/user/list", response={200: list[UserBaseSchema]})
-@paginate(PageNumberPagination, page_size=20)
+@paginate(SeekPagination, page_size=20, count_key=lambda request: USER_COUNT_KEY, seek_fields=("name", "id"))
 def get_user_list(request):
-    return User.objects.all().order_by("name")
+    return User.objects.all().order_by("name", "id")
+
+@management_router.get("/user/list/stream")
+def stream_user_list(request):
+    return stream_queryset(User.objects.all().order_by("name", "id"), UserBaseSchema.Meta.fields)
 
 @management_router.post("/user", response={201: UserSchemaOut, **user_create_errors})
 def create_user(request, payload: UserSchemaIn):
     try:
-        user = User.objects.create_user(email=payload.email, name=payload.name, password=payload.password)
+        with transaction.atomic():
+            user = User.objects.create_user(email=payload.email, name=payload.name, password=payload.password)
+            token = AuthToken.objects.create(user=user)
     except IntegrityError:
         return 400, user_create_errors[400].EmailInUse.value
 
-    AuthToken.objects.create(user=user)
+    user.token_key = token.key
     return 201, user
 
 @management_router.get("/user/{user_id}", response={200: UserBaseSchema, **user_errors})
@@ -38,22 +48,28 @@ def update_user(request, user_id: int, payload: UserSchemaUpdate):
     updated_fields = payload.dict(exclude_unset=True)
     password = updated_fields.pop("password", None)
 
-    try:
-        user = User.objects.get(pk=user_id)
-    except User.DoesNotExist:
-        return 400, user_update_errors[400].UserNotFound.value
+    with transaction.atomic():
+        try:
+            user = (
+                User.objects.select_for_update()
+                .annotate(token_key=Subquery(user_token_key))
+                .get(pk=user_id)
+            )
+        except User.DoesNotExist:
+            return 400, user_update_errors[400].UserNotFound.value
 
-    email_check = User.objects.filter(email=payload.email).first()
-    if email_check:
-        return 400, user_update_errors[400].EmailInUse.value
+        if "email" in updated_fields:
+            email_in_use = User.objects.filter(email=updated_fields["email"]).exclude(pk=user_id).exists()
+            if email_in_use:
+                return 400, user_update_errors[400].EmailInUse.value
 
-    for attr, value in updated_fields.items():
-        setattr(user, attr, value)
+        for attr, value in updated_fields.items():
+            setattr(user, attr, value)
 
-    if password:
-        user.set_password(password)
+        if password:
+            user.set_password(password)
 
-    user.save()
+        user.save()
 
     return 200, user
 
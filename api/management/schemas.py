@@ -20,10 +20,6 @@ class UserSchemaIn(ModelSchema):
 class UserSchemaOut(UserBaseSchema):
     token: str
 
-    @staticmethod
-    def resolve_token(obj):
-        return obj.token
-
 
 class UserSchemaUpdate(ModelSchema):
     class Meta:
@@ -1,8 +1,12 @@
 # python
+import base64
 from decimal import Decimal
 
+from django.core.cache import cache
+from django.db import IntegrityError
 from django.test import TestCase, Client
 import json
+from unittest.mock import patch
 
 from api.models import AuthToken
 from api.tests import TestHelper
@@ -10,9 +14,13 @@ from core.models import User, Product, FavoriteProducts
 
 
 class ManagementTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, _ = TestHelper.create_admin_user()
+
     def setUp(self):
         super().setUp()
-        self.user, _ = TestHelper.create_admin_user()
+        cache.clear()
         self.client = TestHelper.client_from_user(self.user)
 
 
@@ -37,8 +45,7 @@ class GetUserListTests(ManagementTestCase):
         initial_response = self.client.get(self.url)
         initial_count = initial_response.json()['count']
 
-        for i in range(5):
-            TestHelper.create_customer_user(email=f"multiuser{i}@test.com")
+        TestHelper.bulk_create_customer_users(5, "multiuser")
 
         response = self.client.get(self.url)
 
@@ -47,6 +54,20 @@ class GetUserListTests(ManagementTestCase):
 
         self.assertEqual(response_data['count'], initial_count + 5)
 
+    def test_get_user_list_count_refreshed_after_create(self):
+        """Test that creating a user through the API invalidates the cached count"""
+        initial_count = self.client.get(self.url).json()['count']
+
+        self.client.post(
+            "/api/management/user",
+            data={"email": "countuser@test.com", "name": "Count", "password": "password123"},
+            content_type='application/json'
+        )
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.json()['count'], initial_count + 1)
+
     def test_get_user_list_ordered_by_name(self):
         """Test that users are ordered by name"""
         TestHelper.create_customer_user(email="orderuser1@test.com", name="Zara")
@@ -64,8 +85,7 @@ class GetUserListTests(ManagementTestCase):
 
     def test_get_user_list_pagination_first_page(self):
         """Test pagination on first page"""
-        for i in range(25):
-            TestHelper.create_customer_user(email=f"paginuser{i}@test.com")
+        TestHelper.bulk_create_customer_users(25, "paginuser")
 
         response = self.client.get(self.url)
 
@@ -80,8 +100,7 @@ class GetUserListTests(ManagementTestCase):
         initial_response = self.client.get(self.url)
         initial_count = initial_response.json()['count']
 
-        for i in range(25):
-            TestHelper.create_customer_user(email=f"pagin2user{i}@test.com")
+        TestHelper.bulk_create_customer_users(25, "pagin2user")
 
         response = self.client.get(f"{self.url}?page=2")
 
@@ -92,6 +111,56 @@ class GetUserListTests(ManagementTestCase):
         self.assertEqual(response_data['count'], expected_count)
         self.assertGreaterEqual(len(response_data['items']), 0)
 
+    def test_get_user_list_next_cursor(self):
+        """Test that following next_cursor walks the list like page numbers do"""
+        for i in range(25):
+            User.objects.create(name=f"Cursor {i % 3}", email=f"cursor{i}@test.com")
+
+        first_page = self.client.get(self.url).json()
+        second_page = self.client.get(f"{self.url}?after={first_page['next_cursor']}").json()
+
+        self.assertEqual(second_page['items'], self.client.get(f"{self.url}?page=2").json()['items'])
+        self.assertEqual(second_page['count'], first_page['count'])
+        self.assertIsNone(second_page['next_cursor'])
+
+    def test_get_user_list_short_page_skips_count(self):
+        """Test that a page shorter than page_size gives the count without a COUNT query"""
+        # auth lookup + page items
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.json()['count'], User.objects.count())
+
+    def test_get_user_list_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get(f"{self.url}?after=not-a-cursor")
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_user_list_tampered_cursor(self):
+        """Test that a decodable cursor with values of the wrong type is rejected"""
+        for values in (["a", "x"], ["a", None], ["a", [1]]):
+            cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+            response = self.client.get(f"{self.url}?after={cursor}")
+
+            self.assertEqual(response.status_code, 400, values)
+
+    def test_stream_user_list_matches_paginated_list(self):
+        """Test that the streamed user list matches the paginated endpoint"""
+        for i in range(3):
+            User.objects.create(name=f"Stream {i}", email=f"stream{i}@test.com")
+
+        # auth lookup + the streamed rows, no COUNT
+        with self.assertNumQueries(2):
+            response = self.client.get(f"{self.url}/stream")
+            body = b"".join(response.streaming_content)
+
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(body)
+        self.assertEqual(data['items'], self.client.get(self.url).json()['items'])
+        self.assertEqual(data['count'], User.objects.count())
+
     def test_get_user_list_pagination_page_out_of_range(self):
         """Test requesting a page number that doesn't exist"""
         response = self.client.get(f"{self.url}?page=999")
@@ -150,7 +219,7 @@ class CreateUserTests(ManagementTestCase):
 
         response = self.client.post(
             self.url,
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -176,7 +245,7 @@ class CreateUserTests(ManagementTestCase):
 
         response = self.client.post(
             self.url,
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -186,6 +255,45 @@ class CreateUserTests(ManagementTestCase):
         token_exists = AuthToken.objects.filter(user=user).exists()
         self.assertTrue(token_exists)
 
+    def test_create_user_rolls_back_without_token(self):
+        """Test that a failed token insert does not leave a user without a token behind"""
+        payload = {
+            "email": "notoken@test.com",
+            "name": "No Token",
+            "password": "password123"
+        }
+
+        with patch.object(AuthToken.objects, 'create', side_effect=IntegrityError):
+            response = self.client.post(
+                self.url,
+                data=payload,
+                content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(User.objects.filter(email="notoken@test.com").exists())
+
+    def test_create_user_returns_token(self):
+        """Test that the response carries the new user's token without re-querying it"""
+        payload = {
+            "email": "returnstoken@test.com",
+            "name": "Token User",
+            "password": "password123"
+        }
+
+        # auth lookup + SAVEPOINT + user INSERT + token INSERT + RELEASE
+        with self.assertNumQueries(5):
+            response = self.client.post(
+                self.url,
+                data=payload,
+                content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 201)
+
+        token = AuthToken.objects.get(user__email=payload['email'])
+        self.assertEqual(response.json()['token'], token.key)
+
     def test_create_user_duplicate_email(self):
         """Test that creating a user with duplicate email fails"""
         payload = {
@@ -196,7 +304,7 @@ class CreateUserTests(ManagementTestCase):
 
         response1 = self.client.post(
             self.url,
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
         self.assertEqual(response1.status_code, 201)
@@ -209,7 +317,7 @@ class CreateUserTests(ManagementTestCase):
 
         response2 = self.client.post(
             self.url,
-            data=json.dumps(payload2),
+            data=payload2,
             content_type='application/json'
         )
 
@@ -225,7 +333,7 @@ class CreateUserTests(ManagementTestCase):
 
         response = self.client.post(
             self.url,
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -240,7 +348,7 @@ class CreateUserTests(ManagementTestCase):
 
         response = self.client.post(
             self.url,
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -255,7 +363,7 @@ class CreateUserTests(ManagementTestCase):
 
         response = self.client.post(
             self.url,
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -272,7 +380,7 @@ class CreateUserTests(ManagementTestCase):
 
         response = unauthenticated_client.post(
             self.url,
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -291,7 +399,7 @@ class CreateUserTests(ManagementTestCase):
 
         response = customer_client.post(
             self.url,
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -307,7 +415,7 @@ class CreateUserTests(ManagementTestCase):
 
         response = self.client.post(
             self.url,
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -327,7 +435,7 @@ class CreateUserTests(ManagementTestCase):
 
         response = self.client.post(
             self.url,
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -414,9 +522,6 @@ class GetUserTests(ManagementTestCase):
         self.assertEqual(response_data['email'], self.user.email)
 
 
-import json
-
-
 class UpdateUserTests(ManagementTestCase):
     def setUp(self):
         super().setUp()
@@ -430,7 +535,7 @@ class UpdateUserTests(ManagementTestCase):
 
         response = self.client.put(
             self.url_template.format(test_user.id),
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -450,7 +555,7 @@ class UpdateUserTests(ManagementTestCase):
 
         response = self.client.put(
             self.url_template.format(test_user.id),
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -471,7 +576,7 @@ class UpdateUserTests(ManagementTestCase):
 
         response = self.client.put(
             self.url_template.format(test_user.id),
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -492,7 +597,7 @@ class UpdateUserTests(ManagementTestCase):
 
         response = self.client.put(
             self.url_template.format(test_user.id),
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -509,7 +614,7 @@ class UpdateUserTests(ManagementTestCase):
 
         response = self.client.put(
             self.url_template.format(non_existent_id),
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -526,7 +631,7 @@ class UpdateUserTests(ManagementTestCase):
 
         response = self.client.put(
             self.url_template.format(user2.id),
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -534,6 +639,24 @@ class UpdateUserTests(ManagementTestCase):
         response_text = response.json().lower()
         self.assertTrue('email' in response_text or 'use' in response_text)
 
+    def test_update_user_same_email(self):
+        """Test that sending the user's current email is not treated as a conflict"""
+        test_user, _ = TestHelper.create_customer_user(email="sameemail@test.com", name="Old Name")
+
+        payload = {"email": "sameemail@test.com", "name": "New Name"}
+
+        response = self.client.put(
+            self.url_template.format(test_user.id),
+            data=payload,
+            content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+
+        test_user.refresh_from_db()
+        self.assertEqual(test_user.name, "New Name")
+        self.assertEqual(test_user.email, "sameemail@test.com")
+
     def test_update_user_partial_update(self):
         """Test that only provided fields are updated"""
         test_user, _ = TestHelper.create_customer_user(email="partial@test.com", name="Original Name")
@@ -542,7 +665,7 @@ class UpdateUserTests(ManagementTestCase):
 
         response = self.client.put(
             self.url_template.format(test_user.id),
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -561,7 +684,7 @@ class UpdateUserTests(ManagementTestCase):
 
         response = unauthenticated_client.put(
             self.url_template.format(test_user.id),
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -577,7 +700,7 @@ class UpdateUserTests(ManagementTestCase):
 
         response = customer_client.put(
             self.url_template.format(target_user.id),
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -591,7 +714,7 @@ class UpdateUserTests(ManagementTestCase):
 
         response = self.client.put(
             self.url_template.format(test_user.id),
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
@@ -604,6 +727,23 @@ class UpdateUserTests(ManagementTestCase):
 
         self.assertNotIn('password', response_data)
 
+    def test_update_user_returns_token(self):
+        """Test that the response carries the user's token without a separate lookup"""
+        test_user, token = TestHelper.create_customer_user(email="updatetoken@test.com")
+
+        payload = {"name": "Token Name"}
+
+        # auth lookup + savepoint + locked SELECT with token + UPDATE + release
+        with self.assertNumQueries(5):
+            response = self.client.put(
+                self.url_template.format(test_user.id),
+                data=payload,
+                content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['token'], token.key)
+
     def test_update_user_empty_payload(self):
         """Test updating with no fields should still work"""
         test_user, _ = TestHelper.create_customer_user(email="empty@test.com", name="Original")
@@ -612,7 +752,7 @@ class UpdateUserTests(ManagementTestCase):
 
         response = self.client.put(
             self.url_template.format(test_user.id),
-            data=json.dumps(payload),
+            data=payload,
             content_type='application/json'
         )
 
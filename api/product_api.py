@@ -1,15 +1,97 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class ProductNotFoundError(ValueError):
+    """
+    The API answered that the product does not exist.
+    """
 
 
 class ProductAPIClient:
     API_URL = "https://fakestoreapi.com"
+    TIMEOUT = (2, 5)
+    POOL_SIZE = 32
+    MAX_WORKERS = 16
+    PRODUCT_CACHE_TTL = 300
+
+    def __init__(self, retries=0):
+        """
+        `retries` re-sends requests that failed to connect or got a 502/503/504.
+        Leave it at 0 for clients used while serving a request, so the
+        TIMEOUT stays the bound on how long a request waits for the API.
+        """
+        self.session = requests.Session()
+        self.session.mount(self.API_URL, HTTPAdapter(
+            pool_maxsize=self.POOL_SIZE,
+            max_retries=Retry(total=retries, backoff_factor=0.3, status_forcelist=(502, 503, 504)) if retries else 0,
+        ))
+        self.executor = ThreadPoolExecutor(max_workers=self.MAX_WORKERS, thread_name_prefix="product-api")
 
     def get_product(self, p_id):
-        return requests.get(
-            f"{self.API_URL}/products/{p_id}",
-        ).json()
+        """
+        Fetch a product, serving repeated ids from the Django cache for
+        PRODUCT_CACHE_TTL seconds.
+
+        Raises ProductNotFoundError on a 404 or an empty body, which is how
+        the API answers unknown ids, and requests.HTTPError on other errors.
+        """
+        key = f"product_api:{p_id}"
+        data = cache.get(key)
+        if data is None:
+            response = self.session.get(
+                f"{self.API_URL}/products/{p_id}",
+                timeout=self.TIMEOUT,
+            )
+            if response.status_code == 404:
+                raise ProductNotFoundError(f"Product {p_id} does not exist in the API.")
+            response.raise_for_status()
+            if not response.content:
+                raise ProductNotFoundError(f"Product {p_id} does not exist in the API.")
+            data = json.loads(response.content)
+            cache.set(key, data, self.PRODUCT_CACHE_TTL)
+        return data
+
+    def get_products(self, p_ids):
+        """
+        Fetch several products concurrently on the client's thread pool,
+        over the pooled session.
 
-    def get_product_list(self):
-        return requests.get(
+        Returns one entry per id, in order: the product JSON, or the exception
+        raised while fetching it.
+        """
+        def fetch(p_id):
+            try:
+                return self.get_product(p_id)
+            except Exception as e:
+                return e
+
+        return list(self.executor.map(fetch, p_ids))
+
+    def get_product_list(self, etag=None):
+        """
+        Fetch the product catalog, conditionally on `etag` when given.
+
+        Returns `(products, etag)`; `products` is None when the API answers
+        304 Not Modified. Other error statuses raise requests.HTTPError.
+        """
+        headers = {"If-None-Match": etag} if etag else {}
+        response = self.session.get(
             f"{self.API_URL}/products",
-        ).json()
\ No newline at end of file
+            headers=headers,
+            timeout=self.TIMEOUT,
+        )
+        if response.status_code == 304:
+            return None, etag
+        response.raise_for_status()
+        return json.loads(response.content), response.headers.get("ETag")
+
+
+product_api_client = ProductAPIClient()
+# Used by the sync_products command, where waiting out a transient upstream error is cheap
+product_sync_client = ProductAPIClient(retries=3)
\ No newline at end of file
@@ -0,0 +1,36 @@
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from api.models import AuthToken
+from api.utils import USER_COUNT_KEY, auth_token_cache_key, auth_user_cache_key
+from core.models import User
+from core.signals import users_bulk_created
+
+
+@receiver(post_save, sender=User)
+def invalidate_user_count_on_create(sender, instance, created, **kwargs):
+    if created:
+        cache.delete(USER_COUNT_KEY)
+
+
+@receiver(users_bulk_created, sender=User)
+def invalidate_user_count_on_bulk_create(sender, **kwargs):
+    cache.delete(USER_COUNT_KEY)
+
+
+@receiver(post_delete, sender=User)
+def invalidate_user_count_on_delete(sender, instance, **kwargs):
+    cache.delete(USER_COUNT_KEY)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_auth_user(sender, instance, **kwargs):
+    cache.delete(auth_user_cache_key(instance.pk))
+
+
+@receiver(post_save, sender=AuthToken)
+@receiver(post_delete, sender=AuthToken)
+def invalidate_auth_token(sender, instance, **kwargs):
+    cache.delete(auth_token_cache_key(instance.key))
@@ -1,7 +1,9 @@
-from django.test import Client
+from decimal import Decimal
+
+from django.test import Client, override_settings
 
 from api.models import AuthToken
-from core.models import User
+from core.models import FavoriteProducts, Product, User
 
 
 class TestHelper:
@@ -9,15 +11,75 @@ class TestHelper:
     def create_admin_user(cls, name="n", email="e@e.com", password="abc"):
         user = User.objects.create_user(name=name, email=email, password=password, role=User.Role.ADMIN)
         token = AuthToken.objects.create(user=user)
+        user.token_key = token.key
         return user, token
 
     @classmethod
     def create_customer_user(cls, name="n", email="e@e.com", password="abc"):
         user = User.objects.create_user(name=name, email=email, password=password, role=User.Role.CUSTOMER)
         token = AuthToken.objects.create(user=user)
+        user.token_key = token.key
         return user, token
 
+    @classmethod
+    def bulk_create_customer_users(cls, n, prefix, name="n", password="abc"):
+        """
+        Create `n` customers with tokens through User.objects.bulk_create_customers,
+        with a fast hasher since every row hashes its own password.
+        """
+        rows = [{"email": f"{prefix}{i}@test.com", "name": name, "password": password} for i in range(n)]
+        with override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"]):
+            return User.objects.bulk_create_customers(rows)
+
     @classmethod
     def client_from_user(cls, user):
         client = Client(headers={"X-API-Key": user.token})
-        return client
\ No newline at end of file
+        return client
+
+    @classmethod
+    def create_product(cls, api_id, title="Test Product", price=Decimal("99.99")):
+        return Product.objects.create(
+            api_id=api_id,
+            title=title,
+            price=price,
+            description="Test description",
+            category="test",
+            image="https://example.com/image.png"
+        )
+
+    @classmethod
+    def api_product_data(cls, p_id, **overrides):
+        """
+        Product JSON as the external API returns it, with `overrides` applied.
+        """
+        data = {
+            "id": p_id,
+            "title": f"Product {p_id}",
+            "price": 10.0,
+            "description": "Test description",
+            "category": "test",
+            "image": "https://example.com/image.png",
+            "rating": {"rate": 4.0, "count": 3},
+        }
+        data.update(overrides)
+        return data
+
+    @classmethod
+    def create_favorites(cls, user, n):
+        """
+        Create products with api_id 1..n and add them all to `user`'s
+        favorites, in one INSERT each.
+        """
+        products = Product.objects.bulk_create([
+            Product(
+                api_id=i,
+                title=f"Product {i}",
+                price=Decimal("99.99"),
+                description="Test description",
+                category="test",
+                image="https://example.com/image.png"
+            )
+            for i in range(1, n + 1)
+        ])
+        FavoriteProducts.objects.bulk_create([FavoriteProducts(user=user, product=product) for product in products])
+        return products
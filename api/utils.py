@@ -1,52 +1,367 @@
+import base64
+import binascii
+import hashlib
+import json
+import threading
+from concurrent.futures import Future
+
+import requests
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from ninja import Field
+from ninja.errors import HttpError
+from ninja.pagination import PageNumberPagination
+from ninja.renderers import JSONRenderer
 from ninja.security import APIKeyHeader
 from decimal import Decimal
 
 from api.models import AuthToken
-from core.models import Product
+from api.product_api import ProductNotFoundError
+from core.models import Product, User
 
 
 # AUTH
 
-class ApiKey(APIKeyHeader):
-    param_name = "X-API-Key"
+AUTH_CACHE_TTL = 60
 
-    def authenticate(self, request, key):
-        try:
-            token = AuthToken.objects.select_related("user").get(key=key)
-            return token.user
-        except AuthToken.DoesNotExist:
+# User columns the endpoints read from request.auth, in model field order as Model.from_db() expects
+AUTH_USER_COLUMNS = ["id", "name", "email", "role"]
+
+
+def auth_token_cache_key(key):
+    return f"auth_token:{key}"
+
+
+def auth_user_cache_key(user_id):
+    return f"auth_user:{user_id}"
+
+
+def get_user_from_token(key):
+    """
+    Return the user owning the API key `key`, or None.
+
+    The key's user id and the user's AUTH_USER_COLUMNS values are cached
+    separately for AUTH_CACHE_TTL seconds, so a client repeating requests
+    skips the token query. api.signals drops the entries when a token or a
+    user is saved or deleted. The default cache is per process, so other
+    workers may keep accepting a revoked key or an old role for up to
+    AUTH_CACHE_TTL seconds.
+    """
+    user_id = cache.get(auth_token_cache_key(key))
+    values = cache.get(auth_user_cache_key(user_id)) if user_id is not None else None
+
+    if values is None:
+        values = (
+            AuthToken.objects.filter(key=key)
+            .values_list(*(f"user__{column}" for column in AUTH_USER_COLUMNS))
+            .first()
+        )
+        if values is None:
             return None
+        user_id = values[0]
+        cache.set_many({auth_token_cache_key(key): user_id, auth_user_cache_key(user_id): values}, AUTH_CACHE_TTL)
+
+    user = User.from_db(DEFAULT_DB_ALIAS, AUTH_USER_COLUMNS, values)
+    user.token_key = key
+    return user
 
 
-class AdminApiKey(APIKeyHeader):
+class ApiKey(APIKeyHeader):
     param_name = "X-API-Key"
 
+    def __init__(self, admin_only=False):
+        self.admin_only = admin_only
+        super().__init__()
+
     def authenticate(self, request, key):
-        try:
-            token = AuthToken.objects.select_related("user").get(key=key)
-            user = token.user
-            if user.role == user.Role.ADMIN:
-                return user
-        except AuthToken.DoesNotExist:
-            pass
+        user = get_user_from_token(key)
+        if user and (not self.admin_only or user.role == user.Role.ADMIN):
+            return user
+        return None
+
+
+# RENDERING
+
+class CompactJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer without the whitespace json.dumps adds after separators.
+    """
+    json_dumps_params = {"separators": (",", ":")}
+
+
+# PAGINATION
+
+USER_COUNT_KEY = "user_count"
+
+
+def favorites_count_key(user_id):
+    return f"favorites_count:{user_id}"
+
+
+class CachedCountPagination(PageNumberPagination):
+    """
+    PageNumberPagination that caches the total count for COUNT_TTL seconds.
+
+    `count_key` receives the request and returns the cache key for the count,
+    so writers can invalidate it with cache.delete().
+    """
+    COUNT_TTL = 60
+
+    def __init__(self, count_key, **kwargs):
+        self.count_key = count_key
+        super().__init__(**kwargs)
+
+    def paginate_queryset(self, queryset, pagination, **params):
+        page_size = self._get_page_size(pagination.page_size)
+        offset = (pagination.page - 1) * page_size
+        items = list(queryset[offset:offset + page_size])
+        return {
+            "items": items,
+            "count": self._cached_count(queryset, params["request"], self._page_count(offset, items, page_size)),
+        }
+
+    @staticmethod
+    def _page_count(offset, items, page_size):
+        """
+        Total implied by a short page, which must be the last one, or None
+        when the page does not tell.
+        """
+        if len(items) < page_size and (items or offset == 0):
+            return offset + len(items)
         return None
 
+    def _cached_count(self, queryset, request, count=None):
+        key = self.count_key(request)
+        if count is not None:
+            cache.set(key, count, self.COUNT_TTL)
+            return count
+
+        count = cache.get(key)
+        if count is None:
+            count = self._items_count(queryset)
+            cache.set(key, count, self.COUNT_TTL)
+        return count
+
+
+class SeekPagination(CachedCountPagination):
+    """
+    CachedCountPagination that can also seek past the last row of a previous
+    page instead of using OFFSET.
+
+    Each response carries `next_cursor`, the `seek_fields` values of its last
+    row. Passing it back as `after` returns the rows that follow it, so the
+    database never reads and discards earlier pages. The queryset must be
+    ordered by `seek_fields`, ending with a unique field.
+    """
+
+    class Input(PageNumberPagination.Input):
+        after: str | None = Field(None, description="next_cursor from a previous page")
+
+    class Output(PageNumberPagination.Output):
+        next_cursor: str | None = None
+
+    def __init__(self, seek_fields, **kwargs):
+        self.seek_fields = seek_fields
+        super().__init__(**kwargs)
+
+    def paginate_queryset(self, queryset, pagination, **params):
+        page_size = self._get_page_size(pagination.page_size)
+
+        if pagination.after:
+            items = list(queryset.filter(self._seek_filter(queryset.model, pagination.after))[:page_size])
+            count = self._cached_count(queryset, params["request"])
+        else:
+            offset = (pagination.page - 1) * page_size
+            items = list(queryset[offset:offset + page_size])
+            count = self._cached_count(queryset, params["request"], self._page_count(offset, items, page_size))
+
+        next_cursor = self._encode_cursor(items[-1]) if len(items) == page_size else None
+        return {"items": items, "count": count, "next_cursor": next_cursor}
+
+    def _encode_cursor(self, item):
+        values = [getattr(item, field) for field in self.seek_fields]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def _seek_filter(self, model, cursor):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            if not isinstance(values, list) or len(values) != len(self.seek_fields) or None in values:
+                raise ValueError
+            # Coerce each value to its field's type, so a decodable but tampered cursor is a 400 too
+            values = [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.seek_fields, values, strict=True)
+            ]
+        except (binascii.Error, ValueError, ValidationError):
+            raise HttpError(400, "Invalid cursor.") from None
+
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+        seek = Q()
+        for i, field in enumerate(self.seek_fields):
+            equal = dict(zip(self.seek_fields[:i], values[:i], strict=True))
+            seek |= Q(**equal, **{f"{field}__gt": values[i]})
+        return seek
+
+
+# STREAMING
+
+STREAM_CHUNK_SIZE = 100
+
+
+def stream_queryset(queryset, fields, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Stream `queryset` as {"items": [...], "count": N} without building the
+    whole list in memory.
+
+    Rows are read with QuerySet.iterator() and encoded one at a time, and the
+    count is taken from the rows sent, so no COUNT query is needed.
+    """
+    def generate():
+        encoder = DjangoJSONEncoder(separators=(",", ":"))
+        count = 0
+        yield '{"items":['
+        for row in queryset.values(*fields).iterator(chunk_size=chunk_size):
+            yield ("," if count else "") + encoder.encode(row)
+            count += 1
+        yield f'],"count":{count}}}'
+
+    return StreamingHttpResponse(generate(), content_type="application/json")
+
 
 # Helper Functions
 
-def create_product_from_api_data(data):
+PRODUCT_BATCH_SIZE = 500
+
+PRODUCT_API_FIELDS = [
+    "title", "price", "description", "category", "image", "rating_rate", "rating_count", "content_hash",
+    "date_changed",
+]
+
+
+def product_content_hash(data):
+    """
+    Return a 16-byte digest of the canonical JSON of a product's API data.
     """
-    Create and save a Product instance from external API JSON data.
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode(), digest_size=16).digest()
+
+
+def product_from_api_data(data):
     """
-    product = Product(
+    Build an unsaved Product instance from external API JSON data.
+    """
+    rating = data.get("rating") or {}
+    rate = rating.get("rate")
+    return Product(
         api_id=data["id"],
         title=data["title"],
         price=Decimal(str(data["price"])),
         description=data["description"],
         category=data["category"],
         image=data["image"],
-        rating_rate=Decimal(str(data["rating"]["rate"])) if data.get("rating") and data["rating"].get("rate") else None,
-        rating_count=data["rating"]["count"] if data.get("rating") and data["rating"].get("count") else None,
+        rating_rate=Decimal(str(rate)) if rate is not None else None,
+        rating_count=rating.get("count"),
+        content_hash=product_content_hash(data),
     )
-    product.save()
-    return product
+
+
+def upsert_products(products):
+    """
+    Insert or update products by api_id in a single
+    INSERT ... ON CONFLICT (api_id) DO UPDATE, so concurrent requests for the
+    same product never race into an IntegrityError.
+    """
+    return Product.objects.bulk_create(
+        products,
+        update_conflicts=True,
+        unique_fields=["api_id"],
+        update_fields=PRODUCT_API_FIELDS,
+        batch_size=PRODUCT_BATCH_SIZE,
+    )
+
+
+def bulk_create_products_from_api_data(items):
+    """
+    Create or update Product instances from a list of external API JSON
+    objects, one multi-row statement per PRODUCT_BATCH_SIZE items.
+    """
+    return upsert_products([product_from_api_data(data) for data in items])
+
+
+def create_product_from_api_data(data):
+    """
+    Create or update a Product instance from external API JSON data.
+    """
+    return bulk_create_products_from_api_data([data])[0]
+
+
+_product_fetches = {}
+_product_fetches_lock = threading.Lock()
+
+MISSING_PRODUCT_TTL = 60
+
+
+def fetch_product_from_api(client, p_id):
+    """
+    Fetch a product from the external API and store it locally.
+
+    Concurrent calls for the same id share a single upstream request, and ids
+    the API reported as not found are remembered for MISSING_PRODUCT_TTL
+    seconds. Transport, server and payload errors are not remembered.
+    """
+    missing_key = f"product_missing:{p_id}"
+    if cache.get(missing_key):
+        raise ValueError(f"Product {p_id} is not available in the API.")
+
+    with _product_fetches_lock:
+        future = _product_fetches.get(p_id)
+        is_owner = future is None
+        if is_owner:
+            future = _product_fetches[p_id] = Future()
+
+    if not is_owner:
+        return future.result()
+
+    try:
+        product = create_product_from_api_data(client.get_product(p_id))
+    except ProductNotFoundError as e:
+        cache.set(missing_key, True, MISSING_PRODUCT_TTL)
+        future.set_exception(e)
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    else:
+        future.set_result(product)
+        return product
+    finally:
+        with _product_fetches_lock:
+            del _product_fetches[p_id]
+
+
+def fetch_products_from_api(client, p_ids):
+    """
+    Fetch several products from the external API concurrently and store them
+    locally with a single upsert.
+
+    Ids that fail are skipped. The ones the API reported as not found are
+    remembered for MISSING_PRODUCT_TTL seconds, like in fetch_product_from_api.
+    """
+    p_ids = [p_id for p_id in p_ids if not cache.get(f"product_missing:{p_id}")]
+
+    products = []
+    for p_id, data in zip(p_ids, client.get_products(p_ids), strict=True):
+        try:
+            if isinstance(data, Exception):
+                raise data
+            products.append(product_from_api_data(data))
+        except ProductNotFoundError:
+            cache.set(f"product_missing:{p_id}", True, MISSING_PRODUCT_TTL)
+        except (requests.RequestException, KeyError, ValueError):
+            pass
+
+    return upsert_products(products) if products else []
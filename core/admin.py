@@ -1,11 +1,19 @@
 from django.contrib import admin
+from django.db.models import Count
 
-from core.models import User, Product, FavoriteProducts
+from core.models import User, Product, FavoriteProducts, SyncState
 
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
-    list_display = ('name', 'email', 'is_staff', 'role')
+    list_display = ('name', 'email', 'is_staff', 'role', 'fav_count')
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(fav_count=Count('favoriteproducts'))
+
+    @admin.display(description='Favoritos', ordering='fav_count')
+    def fav_count(self, obj):
+        return obj.fav_count
 
 
 @admin.register(Product)
@@ -16,3 +24,9 @@ class ProductAdmin(admin.ModelAdmin):
 @admin.register(FavoriteProducts)
 class FavoriteProductsAdmin(admin.ModelAdmin):
     list_display = ("product", "user")
+    list_select_related = ("product", "user")
+
+
+@admin.register(SyncState)
+class SyncStateAdmin(admin.ModelAdmin):
+    list_display = ("name", "etag", "date_changed")
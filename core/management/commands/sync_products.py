@@ -1,60 +1,142 @@
+from django.core.cache import caches
 from django.core.management.base import BaseCommand
-from decimal import Decimal
+from django.db import transaction
 import requests
-from core.models import Product
+from api.product_api import product_sync_client
+from api.utils import PRODUCT_BATCH_SIZE, product_from_api_data, upsert_products
+from core.models import Product, SyncState
+
+# Columns the diff reads; the rating is kept when the API omits it
+DIFF_FIELDS = ['api_id', 'content_hash', 'rating_rate', 'rating_count']
+SYNC_STATE_NAME = 'products'
+SYNC_CACHE_ALIAS = 'sync'
+SYNC_FETCHED_ETAG_KEY = 'sync_products:fetched_etag'
+SYNC_PAYLOAD_CACHE_TTL = 60 * 60 * 24
+# Products diffed and upserted per round trip
+SYNC_CHUNK_SIZE = PRODUCT_BATCH_SIZE
+
+
+def sync_payload_cache_key(etag):
+    return f'sync_products:payload:{etag}'
 
 
 class Command(BaseCommand):
     help = 'Sync products from external API and update local database'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-cache', action='store_true',
+            help='Ignore a payload kept from an earlier run and request the catalog against the last synced ETag.',
+        )
+
     def handle(self, *args, **options):
         self.stdout.write('Fetching products from API...')
 
+        etag = SyncState.objects.filter(name=SYNC_STATE_NAME).values_list('etag', flat=True).first()
         try:
-            response = requests.get('https://fakestoreapi.com/products')
-            api_products = response.json()
-        except requests.RequestException as e:
+            api_products, new_etag = self.fetch_products(etag, use_cache=not options['no_cache'])
+        except (requests.RequestException, ValueError) as e:
             self.stdout.write(self.style.ERROR(f'Failed to fetch products: {e}'))
             return
 
-        updated_count = 0
-        skipped_count = 0
+        if api_products is None:
+            self.stdout.write(self.style.SUCCESS('Products unchanged since the last sync.'))
+            return
+
+        created_count, updated_count, skipped_count = self.sync_products(api_products)
+        # Stored only once the sync is committed, so a failed run is retried in full
+        if new_etag and new_etag != etag:
+            SyncState.objects.update_or_create(name=SYNC_STATE_NAME, defaults={'etag': new_etag})
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\nSync complete! Created: {created_count}, Updated: {updated_count}, Skipped: {skipped_count}'
+        ))
+
+    def fetch_products(self, etag, use_cache=True):
+        """
+        Return `(products, etag)` for the catalog, or `(None, etag)` when it
+        hasn't changed since the last synced `etag`.
+
+        The catalog is always requested conditionally. Downloaded payloads are
+        kept in the "sync" cache keyed by their ETag, so a run that follows a
+        failed sync sends that ETag instead and, on a 304, reuses the payload.
+        """
+        sync_cache = caches[SYNC_CACHE_ALIAS]
+        fetched_etag = sync_cache.get(SYNC_FETCHED_ETAG_KEY) if use_cache else None
+        cached = None
+        if fetched_etag and fetched_etag != etag:
+            cached = sync_cache.get(sync_payload_cache_key(fetched_etag))
+
+        api_products, new_etag = product_sync_client.get_product_list(
+            etag=fetched_etag if cached is not None else etag,
+        )
+        if api_products is None:
+            return (cached, fetched_etag) if cached is not None else (None, etag)
+
+        if new_etag:
+            sync_cache.set_many(
+                {SYNC_FETCHED_ETAG_KEY: new_etag, sync_payload_cache_key(new_etag): api_products},
+                SYNC_PAYLOAD_CACHE_TTL,
+            )
+        return api_products, new_etag
+
+    @transaction.atomic
+    def sync_products(self, api_products):
+        """
+        Insert the products missing locally and update the ones whose content
+        hash differs from `api_products`, SYNC_CHUNK_SIZE products at a time.
+
+        Runs in one transaction, locking the local rows that are diffed.
+        """
+        lines = []
+        created_count = updated_count = skipped_count = 0
+
+        for start in range(0, len(api_products), SYNC_CHUNK_SIZE):
+            created, updated, skipped = self.sync_chunk(api_products[start:start + SYNC_CHUNK_SIZE], lines)
+            created_count += created
+            updated_count += updated
+            skipped_count += skipped
+
+        if lines:
+            self.stdout.write('\n'.join(lines))
+        return created_count, updated_count, skipped_count
+
+    def sync_chunk(self, api_products, lines):
+        """
+        Diff one chunk against its local rows, loaded with a single SELECT, and
+        write the new and changed products in a single
+        INSERT ... ON CONFLICT (api_id) DO UPDATE. Status lines go to `lines`.
+        """
+        to_upsert = []
+        created_count = updated_count = skipped_count = 0
+
+        api_ids = [product_data['id'] for product_data in api_products]
+        existing = (
+            Product.objects.select_for_update()
+            .filter(api_id__in=api_ids)
+            .only(*DIFF_FIELDS)
+            .in_bulk(field_name='api_id')
+        )
 
         for product_data in api_products:
-            api_id = product_data['id']
-
-            try:
-                product = Product.objects.get(api_id=api_id)
-
-                has_changes = (
-                        product.title != product_data['title'] or
-                        product.price != Decimal(str(product_data['price'])) or
-                        product.description != product_data['description'] or
-                        product.category != product_data['category'] or
-                        product.image != product_data['image']
-                )
-
-                if has_changes:
-                    product.title = product_data['title']
-                    product.price = Decimal(str(product_data['price']))
-                    product.description = product_data['description']
-                    product.category = product_data['category']
-                    product.image = product_data['image']
-
-                    if product_data.get('rating'):
-                        product.rating_rate = Decimal(str(product_data['rating']['rate']))
-                        product.rating_count = product_data['rating']['count']
-
-                    product.save()
-                    updated_count += 1
-                    self.stdout.write(f'Updated product: {product.title}')
-                else:
+            new_product = product_from_api_data(product_data)
+            product = existing.get(product_data['id'])
+
+            if product is None:
+                created_count += 1
+                lines.append(f'Created product: {new_product.title}')
+            else:
+                if product.content_hash == new_product.content_hash:
                     skipped_count += 1
+                    continue
 
-            except Product.DoesNotExist:
-                skipped_count += 1
-                continue
+                if not product_data.get('rating'):
+                    new_product.rating_rate, new_product.rating_count = product.rating_rate, product.rating_count
 
-        self.stdout.write(self.style.SUCCESS(
-            f'\nSync complete! Updated: {updated_count}, Skipped: {skipped_count}'
-        ))
+                updated_count += 1
+                lines.append(f'Updated product: {new_product.title}')
+
+            to_upsert.append(new_product)
+
+        upsert_products(to_upsert)
+        return created_count, updated_count, skipped_count
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-15 04:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='favoriteproducts',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='favoriteproducts',
+            constraint=models.UniqueConstraint(fields=('user', 'product'), name='unique_favorite_product'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-15 04:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0002_favoriteproducts_unique_constraint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['name', 'id'], name='user_name_id_idx'),
+        ),
+    ]
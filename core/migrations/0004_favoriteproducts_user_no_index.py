@@ -0,0 +1,20 @@
+# Generated by Django 5.2.7 on 2026-10-15 04:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_user_name_id_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='favoriteproducts',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-15 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_favoriteproducts_user_no_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('date_changed', models.DateTimeField(auto_now=True, verbose_name='Modificado em')),
+                ('active', models.BooleanField(default=True, verbose_name='Ativo')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('etag', models.CharField(blank=True, max_length=255)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
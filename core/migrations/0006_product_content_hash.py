@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-15 04:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_syncstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='content_hash',
+            field=models.BinaryField(blank=True, max_length=16, null=True),
+        ),
+    ]
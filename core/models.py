@@ -1,5 +1,10 @@
+from django.apps import apps
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
+from django.utils.functional import cached_property
+
+from core.signals import users_bulk_created
 
 
 class UserManager(BaseUserManager):
@@ -13,7 +18,7 @@ class UserManager(BaseUserManager):
         return user
 
     def create_superuser(self, email, name, password=None, **extra_fields):
-        from api.models import AuthToken
+        AuthToken = apps.get_model('api', 'AuthToken')
 
         extra_fields.setdefault('is_staff', True)
         extra_fields.setdefault('is_superuser', True)
@@ -24,6 +29,33 @@ class UserManager(BaseUserManager):
 
         return user
 
+    def bulk_create_customers(self, rows):
+        """
+        Create customers with their tokens in one INSERT each, from `rows` of
+        dicts with email, name and password. Returns the users with their
+        token primed.
+
+        bulk_create doesn't send post_save, so users_bulk_created is sent
+        instead for the receivers that drop cached user data.
+        """
+        AuthToken = apps.get_model('api', 'AuthToken')
+
+        users = self.bulk_create([
+            self.model(
+                email=self.normalize_email(row['email']),
+                name=row['name'],
+                password=make_password(row['password']),
+                role=self.model.Role.CUSTOMER,
+            )
+            for row in rows
+        ])
+        tokens = AuthToken.objects.bulk_create([AuthToken(user=user, key=AuthToken.generate_key()) for user in users])
+        for user, token in zip(users, tokens, strict=True):
+            user.token_key = token.key
+        users_bulk_created.send(sender=self.model, users=users)
+
+        return users
+
 
 class User(AbstractUser):
     class Role(models.TextChoices):
@@ -42,6 +74,11 @@ class User(AbstractUser):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["name"]
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=["name", "id"], name="user_name_id_idx"),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -53,9 +90,15 @@ class User(AbstractUser):
     def is_customer(self):
         return self.role == self.Role.CUSTOMER
 
-    @property
+    @cached_property
     def token(self):
-        obj_token = self.tokens.first()
+        # Primed by the token lookup/annotation, or served from prefetch_related("tokens")
+        if hasattr(self, "token_key"):
+            return self.token_key
+        if "tokens" in getattr(self, "_prefetched_objects_cache", {}):
+            obj_token = min(self.tokens.all(), key=lambda token: token.pk, default=None)
+        else:
+            obj_token = self.tokens.first()
         if obj_token:
             return obj_token.key
         return None
@@ -79,14 +122,27 @@ class Product(AuditedModel):
     image = models.URLField()
     rating_rate = models.DecimalField(decimal_places=1, max_digits=3, null=True, blank=True)
     rating_count = models.IntegerField(null=True, blank=True)
+    # Digest of the API payload the product was last written from, see api.utils.product_content_hash
+    content_hash = models.BinaryField(max_length=16, null=True, blank=True)
 
     def __str__(self):
         return self.title
 
 
 class FavoriteProducts(AuditedModel):
-    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Lookups by user are served by the leading column of unique_favorite_product
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
 
     class Meta:
-        unique_together = ("user", "product")
+        constraints = [
+            models.UniqueConstraint(fields=["user", "product"], name="unique_favorite_product"),
+        ]
+
+
+class SyncState(AuditedModel):
+    name = models.CharField(max_length=255, unique=True)
+    etag = models.CharField(max_length=255, blank=True)
+
+    def __str__(self):
+        return self.name
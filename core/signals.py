@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# Sent by UserManager.bulk_create_customers, since bulk_create skips post_save
+users_bulk_created = Signal()
@@ -1,3 +1,295 @@
-from django.test import TestCase
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+import requests
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from api.models import AuthToken
+from api.product_api import product_sync_client
+from api.tests import TestHelper
+from api.utils import USER_COUNT_KEY, product_content_hash
+from core.management.commands.sync_products import SYNC_FETCHED_ETAG_KEY, sync_payload_cache_key
+from core.models import FavoriteProducts, Product, SyncState, User
+
+
+@override_settings(CACHES={
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "sync": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "sync"},
+})
+class SyncProductsTests(TestCase):
+    def setUp(self):
+        super().setUp()
+        caches["sync"].clear()
+        self.products = Product.objects.bulk_create([
+            Product(
+                api_id=i,
+                title=f"Product {i}",
+                price=Decimal("10.00"),
+                description="Test description",
+                category="test",
+                image="https://example.com/image.png",
+                rating_rate=Decimal("4.0"),
+                rating_count=3,
+                content_hash=product_content_hash(TestHelper.api_product_data(i)),
+            )
+            for i in range(1, 4)
+        ])
+
+    def sync(self, api_products, etag=None, **options):
+        out = StringIO()
+        with patch('core.management.commands.sync_products.product_sync_client') as mock_client:
+            mock_client.get_product_list.return_value = (api_products, etag)
+            call_command('sync_products', stdout=out, **options)
+        self.mock_client = mock_client
+        return out.getvalue()
+
+    def test_sync_updates_changed_products(self):
+        """Test that products whose API data changed are updated locally"""
+        self.sync([
+            TestHelper.api_product_data(1, title="Renamed"),
+            TestHelper.api_product_data(2, price=12.5),
+            TestHelper.api_product_data(3),
+        ])
+
+        self.assertEqual(Product.objects.get(api_id=1).title, "Renamed")
+        self.assertEqual(Product.objects.get(api_id=2).price, Decimal("12.50"))
+
+    def test_sync_loads_local_products_in_one_query(self):
+        """Test that local products are looked up with a single SELECT"""
+        # ETag lookup + SAVEPOINT + local products SELECT + one upsert for the changed product + RELEASE
+        with self.assertNumQueries(5):
+            output = self.sync([
+                TestHelper.api_product_data(1, title="Renamed"),
+                TestHelper.api_product_data(2),
+                TestHelper.api_product_data(3),
+            ])
+
+        self.assertIn("Updated: 1, Skipped: 2", output)
+
+    def test_sync_writes_changed_products_in_one_upsert(self):
+        """Test that all changed products are written with a single upsert"""
+        before = Product.objects.get(api_id=1).date_changed
+
+        # ETag lookup + SAVEPOINT + local products SELECT + one upsert + RELEASE
+        with self.assertNumQueries(5):
+            output = self.sync([TestHelper.api_product_data(i, title=f"Renamed {i}") for i in range(1, 4)])
+
+        self.assertIn("Updated: 3, Skipped: 0", output)
+        self.assertIn("Updated product: Renamed 1\nUpdated product: Renamed 2\nUpdated product: Renamed 3", output)
+        self.assertEqual(
+            list(Product.objects.order_by("api_id").values_list("title", flat=True)),
+            ["Renamed 1", "Renamed 2", "Renamed 3"],
+        )
+        self.assertGreater(Product.objects.get(api_id=1).date_changed, before)
+
+    def test_sync_creates_new_products(self):
+        """Test that products missing locally are inserted alongside the updates"""
+        # ETag lookup + SAVEPOINT + local products SELECT + one upsert + RELEASE
+        with self.assertNumQueries(5):
+            output = self.sync([TestHelper.api_product_data(1, title="Renamed"), TestHelper.api_product_data(2), TestHelper.api_product_data(4)])
+
+        self.assertIn("Created: 1, Updated: 1, Skipped: 1", output)
+        self.assertIn("Created product: Product 4", output)
+        self.assertEqual(Product.objects.get(api_id=1).title, "Renamed")
+        self.assertEqual(Product.objects.get(api_id=4).rating_count, 3)
+
+    def test_sync_backfills_missing_content_hash(self):
+        """Test that a product without a stored hash is rewritten once, then skipped"""
+        Product.objects.filter(api_id=1).update(content_hash=None)
+
+        first = self.sync([TestHelper.api_product_data(1)])
+        second = self.sync([TestHelper.api_product_data(1)])
+
+        self.assertIn("Updated: 1, Skipped: 0", first)
+        self.assertIn("Updated: 0, Skipped: 1", second)
+        self.assertEqual(bytes(Product.objects.get(api_id=1).content_hash), product_content_hash(TestHelper.api_product_data(1)))
+
+    @patch('core.management.commands.sync_products.SYNC_CHUNK_SIZE', 2)
+    def test_sync_processes_products_in_chunks(self):
+        """Test that each chunk is loaded and upserted with one query each"""
+        # ETag lookup + SAVEPOINT + (SELECT + upsert) per chunk of 2 + RELEASE
+        with self.assertNumQueries(7):
+            output = self.sync([TestHelper.api_product_data(i, title=f"Renamed {i}") for i in range(1, 5)])
+
+        self.assertIn("Created: 1, Updated: 3, Skipped: 0", output)
+        self.assertEqual(Product.objects.filter(title__startswith="Renamed").count(), 4)
+
+    def test_sync_updates_changed_rating(self):
+        """Test that a rating-only change is picked up by the diff"""
+        api_product = TestHelper.api_product_data(1, rating={"rate": 4.5, "count": 10})
+
+        output = self.sync([api_product])
+
+        product = Product.objects.get(api_id=1)
+        self.assertIn("Updated: 1, Skipped: 0", output)
+        self.assertEqual((product.rating_rate, product.rating_count), (Decimal("4.5"), 10))
+
+    def test_sync_product_without_rating_single_update(self):
+        """Test that updating a product the API sends without rating needs no extra queries"""
+        api_product = TestHelper.api_product_data(1, title="Renamed")
+        del api_product["rating"]
+
+        # ETag lookup + SAVEPOINT + local products SELECT + one upsert + RELEASE
+        with self.assertNumQueries(5):
+            self.sync([api_product])
+
+        product = Product.objects.get(api_id=1)
+        self.assertEqual(product.title, "Renamed")
+        self.assertEqual((product.rating_rate, product.rating_count), (Decimal("4.0"), 3))
+
+    def test_sync_stores_etag_and_sends_it_back(self):
+        """Test that the response ETag is stored and sent on the next run"""
+        self.sync([TestHelper.api_product_data(1)], etag='"v1"')
+        self.assertEqual(SyncState.objects.get(name="products").etag, '"v1"')
+
+        self.sync([TestHelper.api_product_data(1)], etag='"v1"', no_cache=True)
+        self.mock_client.get_product_list.assert_called_once_with(etag='"v1"')
+
+    def test_sync_keeps_payload_by_etag(self):
+        """Test that a downloaded payload is kept in the sync cache under its ETag"""
+        self.sync([TestHelper.api_product_data(1, title="Renamed")], etag='"v1"')
+
+        self.assertEqual(caches["sync"].get(SYNC_FETCHED_ETAG_KEY), '"v1"')
+        self.assertEqual(caches["sync"].get(sync_payload_cache_key('"v1"')), [TestHelper.api_product_data(1, title="Renamed")])
+
+    def test_sync_reuses_payload_of_failed_run(self):
+        """Test that a payload fetched by a failed run is revalidated and reused on a 304"""
+        SyncState.objects.create(name="products", etag='"v1"')
+        caches["sync"].set_many({
+            SYNC_FETCHED_ETAG_KEY: '"v2"',
+            sync_payload_cache_key('"v2"'): [TestHelper.api_product_data(1, title="Renamed")],
+        })
+
+        output = self.sync(None, etag='"v2"')
+
+        self.mock_client.get_product_list.assert_called_once_with(etag='"v2"')
+        self.assertIn("Updated: 1, Skipped: 0", output)
+        self.assertEqual(Product.objects.get(api_id=1).title, "Renamed")
+        self.assertEqual(SyncState.objects.get(name="products").etag, '"v2"')
+
+    def test_sync_no_cache_ignores_kept_payload(self):
+        """Test that --no-cache requests the catalog against the last synced ETag"""
+        SyncState.objects.create(name="products", etag='"v1"')
+        caches["sync"].set_many({
+            SYNC_FETCHED_ETAG_KEY: '"v2"',
+            sync_payload_cache_key('"v2"'): [TestHelper.api_product_data(1, title="Renamed")],
+        })
+
+        output = self.sync(None, etag='"v1"', no_cache=True)
+
+        self.mock_client.get_product_list.assert_called_once_with(etag='"v1"')
+        self.assertIn("Products unchanged", output)
+        self.assertEqual(Product.objects.get(api_id=1).title, "Product 1")
+
+    def test_sync_short_circuits_when_not_modified(self):
+        """Test that a 304 from the API skips the sync entirely"""
+        SyncState.objects.create(name="products", etag='"v1"')
+
+        # ETag lookup only
+        with self.assertNumQueries(1):
+            output = self.sync(None, etag='"v1"')
+
+        self.assertIn("Products unchanged", output)
+        self.assertEqual(Product.objects.get(api_id=1).title, "Product 1")
+
+    def test_sync_reports_server_error(self):
+        """Test that a 5xx with a JSON body is reported instead of synced or cached"""
+        response = requests.Response()
+        response.status_code = 500
+        response._content = b'{"error":"boom"}'
+        response.headers["ETag"] = '"err"'
+
+        out = StringIO()
+        with patch.object(product_sync_client.session, 'get', return_value=response):
+            call_command('sync_products', stdout=out)
+
+        self.assertIn("Failed to fetch products", out.getvalue())
+        self.assertIsNone(caches["sync"].get(SYNC_FETCHED_ETAG_KEY))
+        self.assertFalse(SyncState.objects.exists())
+
+    def test_sync_reports_fetch_failure(self):
+        """Test that an API failure is reported and leaves products untouched"""
+        out = StringIO()
+        with patch('core.management.commands.sync_products.product_sync_client') as mock_client:
+            mock_client.get_product_list.side_effect = requests.RequestException("API Down")
+            call_command('sync_products', stdout=out)
+
+        self.assertIn("Failed to fetch products", out.getvalue())
+        self.assertEqual(Product.objects.get(api_id=1).title, "Product 1")
+
+
+class UserTokenTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(email="token@test.com", name="Token", password="abc")
+        cls.auth_token = AuthToken.objects.create(user=cls.user)
+
+    def test_token_is_cached_on_the_instance(self):
+        """Test that repeated reads of user.token run a single query"""
+        user = User.objects.get(pk=self.user.pk)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.token, self.auth_token.key)
+            self.assertEqual(user.token, self.auth_token.key)
+
+    def test_token_uses_prefetched_tokens(self):
+        """Test that user.token reads prefetched tokens without querying"""
+        users = list(User.objects.prefetch_related("tokens"))
+
+        with self.assertNumQueries(0):
+            self.assertEqual([user.token for user in users], [self.auth_token.key])
+
+
+class UserManagerTests(TestCase):
+    def test_bulk_create_customers(self):
+        """Test that customers and their tokens are created with one INSERT each"""
+        rows = [{"email": f"bulk{i}@test.com", "name": f"Bulk {i}", "password": "abc"} for i in range(3)]
+
+        with self.assertNumQueries(2):
+            users = User.objects.bulk_create_customers(rows)
+
+        self.assertEqual(
+            [user.token for user in users],
+            [AuthToken.objects.get(user__email=row["email"]).key for row in rows],
+        )
+        self.assertTrue(all(user.is_customer and user.check_password("abc") for user in users))
+
+    def test_bulk_create_customers_drops_user_count(self):
+        """Test that the cached user count is invalidated without post_save"""
+        caches["default"].set(USER_COUNT_KEY, 1)
+
+        User.objects.bulk_create_customers([{"email": "count@test.com", "name": "Count", "password": "abc"}])
+
+        self.assertIsNone(caches["default"].get(USER_COUNT_KEY))
+
+
+class UserAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(email="admin@test.com", name="Admin", password="abc")
+        products = Product.objects.bulk_create([
+            Product(api_id=i, title=f"Product {i}", price=Decimal("10.00"), description="d", category="c",
+                    image="https://example.com/image.png")
+            for i in range(1, 3)
+        ])
+        for i in range(3):
+            user = User.objects.create_user(email=f"fav{i}@test.com", name=f"Fav {i}", password="abc")
+            FavoriteProducts.objects.bulk_create([FavoriteProducts(user=user, product=p) for p in products[:i]])
+
+    def test_changelist_counts_favorites_in_one_query(self):
+        """Test that the favorites column comes from the annotated changelist query, not one query per user"""
+        self.client.force_login(self.admin)
+
+        # session + request user + paginator COUNT + full result COUNT + annotated rows
+        with self.assertNumQueries(5):
+            response = self.client.get("/admin/core/user/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Favoritos")
+        self.assertEqual(
+            sorted(user.fav_count for user in response.context["cl"].result_list),
+            [0, 0, 1, 2],
+        )